@@ -7,6 +7,7 @@ import os
 import random
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple, Union
 
@@ -414,7 +415,9 @@ class LLM:
 
         try:
             platform_type = self.config.get("platform", "openai")
-            model = self.config.get("aoai_generation_model", "gpt-4o")
+            # Honor the engine the caller asked for (e.g. aoai_debug_model or a
+            # tiered retry model); fall back to the configured generation model.
+            model = engine or self.config.get("aoai_generation_model", "gpt-4o")
             is_reasoning = model.startswith("o1") or model.startswith("o3")
 
             # Reasoning models (o1/o3) require temperature=1.0
@@ -522,11 +525,20 @@ class LLM:
                 saw_input_usage = False
                 saw_output_usage = False
 
-                for _ in range(max(answer_num, 1)):
+                def _post_one_sample(_idx):
                     resp = requests.post(url, headers=headers, json=payload, timeout=api_timeout)
                     resp.raise_for_status()
-                    response_json = resp.json()
+                    return resp.json()
 
+                # Anthropic returns one sample per request (no `n` parameter),
+                # so the N samples used to be fetched back-to-back, each
+                # blocking on a full max_tokens decode before the next started.
+                # Issue them concurrently instead; executor.map preserves order.
+                num_samples = max(answer_num, 1)
+                with ThreadPoolExecutor(max_workers=num_samples) as executor:
+                    sample_responses = list(executor.map(_post_one_sample, range(num_samples)))
+
+                for response_json in sample_responses:
                     usage = response_json.get("usage", {}) if isinstance(response_json, dict) else {}
                     input_value = usage.get("input_tokens")
                     output_value = usage.get("output_tokens")
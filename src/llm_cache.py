@@ -5,6 +5,7 @@ A simple caching mechanism for LLM API calls to avoid redundant API calls.
 import hashlib
 import json
 import os
+import tempfile
 import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -225,8 +226,23 @@ class LLMCache:
             if not self.cache_dir.exists():
                 self.cache_dir.mkdir(exist_ok=True, parents=True)
 
-            with open(cache_file, "w") as f:
-                json.dump(cache_data, f, indent=2)
+            # Write to a temp file in the same directory, then atomically
+            # rename into place. The cache directory is shared by all worker
+            # processes, so a concurrent reader must never observe a
+            # half-written JSON entry (which would count as a miss and
+            # trigger a duplicate API call).
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.cache_dir, prefix=f".{cache_key}.", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(cache_data, f, indent=2)
+                os.replace(tmp_path, cache_file)
+            except Exception:
+                # Clean up the temp file on failure; the outer handler logs.
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
 
             if self.logger:
                 if self.enabled:
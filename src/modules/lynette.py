@@ -2,6 +2,7 @@
 # Licensed under the MIT license.      #
 
 
+import json
 import os
 import subprocess
 import tempfile
@@ -9,31 +10,76 @@ from pathlib import Path
 
 
 class Lynette:
-    meta_command = [
-        "cargo",
-        "run",
-        "--manifest-path="
-        + os.path.abspath(
-            os.path.join(
-                os.path.dirname(__file__),
-                "..",
-                "..",
-                "utils",
-                "lynette",
-                "source",
-                "Cargo.toml",
-            )
-        ),
-        "--",
-    ]
+    manifest_path = os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+            "..",
+            "utils",
+            "lynette",
+            "source",
+            "Cargo.toml",
+        )
+    )
     env = os.environ.copy()
     env["RUSTFLAGS"] = "-Awarnings"
 
+    # Resolved lynette executables, keyed by manifest path. `cargo run`
+    # re-checks every dependency and the lockfile on each invocation, which
+    # costs hundreds of ms even when the binary is already built; building
+    # once and invoking the executable directly skips that startup cost.
+    # A value of None means the build failed and `cargo run` is used instead.
+    _binaries = {}
+
+    @classmethod
+    def _resolve_binary(cls, manifest_path):
+        if manifest_path in cls._binaries:
+            return cls._binaries[manifest_path]
+        executable = None
+        try:
+            m = subprocess.run(
+                [
+                    "cargo",
+                    "build",
+                    "--release",
+                    "--manifest-path",
+                    manifest_path,
+                    "--message-format=json",
+                ],
+                env=cls.env,
+                capture_output=True,
+                text=True,
+                timeout=600,
+            )
+            if m.returncode == 0:
+                for line in m.stdout.splitlines():
+                    try:
+                        msg = json.loads(line)
+                    except ValueError:
+                        continue
+                    if msg.get("reason") == "compiler-artifact" and msg.get("executable"):
+                        executable = msg["executable"]
+        except Exception:
+            executable = None
+        cls._binaries[manifest_path] = executable
+        return executable
+
+    # Command prefix for invoking lynette: the prebuilt binary when the
+    # one-time build succeeded, otherwise the original `cargo run` form.
+    @classmethod
+    def command_prefix(cls, manifest_path=None):
+        if manifest_path is None:
+            manifest_path = cls.manifest_path
+        binary = cls._resolve_binary(manifest_path)
+        if binary:
+            return [binary]
+        return ["cargo", "run", "--manifest-path=" + manifest_path, "--"]
+
     # Run a command
     # @command: a list of lynette commands arguemnts, e.g. ["compare", "foo.rs", "bar.rs"]
     # @return: a CompletedProcess object(returned by subprocess.run(...))
     def run(self, command):
-        command = self.meta_command + command
+        command = self.command_prefix() + command
         return subprocess.run(command, env=self.env, capture_output=True, text=True)
 
     def code_unimpl(self, file):
@@ -11,8 +11,10 @@ This module tracks detailed statistics for research paper reporting:
 """
 
 import json
+import logging
 import time
-from collections import defaultdict
+from array import array
+from collections import Counter, defaultdict
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
@@ -25,7 +27,9 @@ class StatisticsCollector:
     Collects detailed statistics during VeriStruct execution for research analysis.
     """
 
-    def __init__(self, output_dir: Path, benchmark_name: str, logger):
+    def __init__(
+        self, output_dir: Path, benchmark_name: str, logger, record_per_call: bool = False
+    ):
         """
         Initialize the statistics collector.
 
@@ -33,6 +37,9 @@ class StatisticsCollector:
             output_dir: Directory where statistics will be saved
             benchmark_name: Name of the benchmark being processed
             logger: Logger instance
+            record_per_call: Whether to retain a per-call token-usage row for
+                every LLM call (the by_call list in the detailed JSON).
+                Aggregate token totals are always tracked.
         """
         self.output_dir = output_dir
         self.benchmark_name = benchmark_name
@@ -53,8 +60,8 @@ class StatisticsCollector:
             # LLM call tracking
             "llm_calls": {
                 "total": 0,
-                "by_stage": defaultdict(int),
-                "by_module": defaultdict(int),
+                "by_stage": Counter(),
+                "by_module": Counter(),
                 "response_times": [],  # List of (stage, module, time) tuples
                 "cache_hits": 0,
                 "cache_misses": 0,
@@ -65,15 +72,15 @@ class StatisticsCollector:
             },
             # Iteration tracking
             "iterations": {
-                "by_module": defaultdict(int),
-                "by_stage": defaultdict(int),
+                "by_module": Counter(),
+                "by_stage": Counter(),
             },
             # Repair tracking
             "repairs": {
                 "total_rounds": 0,
                 "total_repairs": 0,
-                "repairs_by_type": defaultdict(int),
-                "repairs_by_heuristic": defaultdict(int),
+                "repairs_by_type": Counter(),
+                "repairs_by_heuristic": Counter(),
                 "successful_repairs": 0,
                 "failed_repairs": 0,
                 "repair_times": [],  # List of (repair_type, heuristic, time, success) tuples
@@ -82,8 +89,8 @@ class StatisticsCollector:
             "errors": {
                 "initial_error_count": 0,
                 "final_error_count": 0,
-                "errors_by_type": defaultdict(int),
-                "errors_fixed_by_type": defaultdict(int),
+                "errors_by_type": Counter(),
+                "errors_fixed_by_type": Counter(),
             },
             # Verification results
             "verification": {
@@ -101,10 +108,45 @@ class StatisticsCollector:
             },
         }
 
+        # Per-LLM-call records are buffered as parallel arrays (structure of
+        # arrays) instead of one dict per call: a long run makes thousands of
+        # calls, and the dict rows are only ever needed at save time. The
+        # "response_times" and "by_call" entries above are materialized from
+        # these buffers in save().
+        self._rt_stages: List[str] = []
+        self._rt_modules: List[str] = []
+        self._rt_times = array("d")
+        self._rt_cache_hits = bytearray()
+        # by_call rows are never read by get_summary or the report, only
+        # dumped to the detailed JSON; retaining them is opt-in since they
+        # are the largest per-call allocation in long runs.
+        self._record_per_call = record_per_call
+        self._call_stages: List[str] = []
+        self._call_modules: List[str] = []
+        self._call_input_tokens: List[Optional[int]] = []
+        self._call_output_tokens: List[Optional[int]] = []
+        self._call_cache_hits = bytearray()
+        self._call_times: List[Optional[float]] = []
+
+        # Rolling sum of response times so get_summary computes the average
+        # in O(1) instead of re-iterating every recorded call.
+        self._llm_time_sum = 0.0
+
         # Create statistics directory
         self.stats_dir = output_dir / "statistics"
         self.stats_dir.mkdir(exist_ok=True, parents=True)
 
+        # Set sidecar for modules_activated so stage starts check membership
+        # in O(1); the list itself is kept for ordered output.
+        self._modules_seen: Set[str] = set()
+
+        # Whether DEBUG records would actually be emitted; checked before
+        # formatting per-event debug strings on hot paths. Loguru loggers
+        # have no isEnabledFor, so they keep the always-format behaviour.
+        self._debug_enabled = not hasattr(logger, "isEnabledFor") or logger.isEnabledFor(
+            logging.DEBUG
+        )
+
         # Tracking state
         self.current_stage = None
         self.current_module = None
@@ -119,11 +161,15 @@ class StatisticsCollector:
             stage_name: Name of the stage
             step_number: Step number in the execution
         """
+        # One clock read per event; stage timestamps are stored as epoch
+        # floats on the hot path and rendered to ISO strings in save().
+        now = time.time()
         self.current_stage = stage_name
-        self.stage_start_time = time.time()
+        self.stage_start_time = now
 
         # Add to modules activated if not already present
-        if stage_name not in self.stats["modules_activated"]:
+        if stage_name not in self._modules_seen:
+            self._modules_seen.add(stage_name)
             self.stats["modules_activated"].append(stage_name)
             self.stats["modules_count"] += 1
 
@@ -131,7 +177,7 @@ class StatisticsCollector:
         if stage_name not in self.stats["stages"]:
             self.stats["stages"][stage_name] = {
                 "step_number": step_number,
-                "start_time": datetime.now().isoformat(),
+                "start_time": now,
                 "end_time": None,
                 "execution_time": None,
                 "llm_calls": 0,
@@ -139,7 +185,8 @@ class StatisticsCollector:
                 "result": None,
             }
 
-        self.logger.debug(f"Statistics: Started tracking stage {stage_name}")
+        if self._debug_enabled:
+            self.logger.debug(f"Statistics: Started tracking stage {stage_name}")
 
     def end_stage(
         self,
@@ -159,11 +206,12 @@ class StatisticsCollector:
             self.logger.warning(f"Attempting to end stage {stage_name} that was not started")
             return
 
+        now = time.time()
         stage = self.stats["stages"][stage_name]
-        stage["end_time"] = datetime.now().isoformat()
+        stage["end_time"] = now
 
         if self.stage_start_time:
-            stage["execution_time"] = time.time() - self.stage_start_time
+            stage["execution_time"] = now - self.stage_start_time
 
         stage["iterations"] = iterations
         self.stats["iterations"]["by_stage"][stage_name] += iterations
@@ -179,7 +227,8 @@ class StatisticsCollector:
 
         self.current_stage = None
         self.stage_start_time = None
-        self.logger.debug(f"Statistics: Ended tracking stage {stage_name}")
+        if self._debug_enabled:
+            self.logger.debug(f"Statistics: Ended tracking stage {stage_name}")
 
     def record_llm_call(
         self,
@@ -199,49 +248,51 @@ class StatisticsCollector:
             response_time: Time taken for the LLM call
             cache_hit: Whether this was a cache hit
         """
-        self.stats["llm_calls"]["total"] += 1
+        # Normalize tokens up front so the counting below is plain integer
+        # arithmetic instead of per-call isinstance checks.
+        has_token_info = input_tokens is not None or output_tokens is not None
+        input_tokens = int(input_tokens) if input_tokens else 0
+        output_tokens = int(output_tokens) if output_tokens else 0
+
+        # Bind the hot sub-dict once; this function runs on every LLM call.
+        llm_calls = self.stats["llm_calls"]
+        llm_calls["total"] += 1
 
         stage_name = stage or self.current_stage or "unknown"
         module_name = module or stage_name
 
-        self.stats["llm_calls"]["by_stage"][stage_name] += 1
-        self.stats["llm_calls"]["by_module"][module_name] += 1
+        llm_calls["by_stage"][stage_name] += 1
+        llm_calls["by_module"][module_name] += 1
 
         if cache_hit:
-            self.stats["llm_calls"]["cache_hits"] += 1
+            llm_calls["cache_hits"] += 1
         else:
-            self.stats["llm_calls"]["cache_misses"] += 1
+            llm_calls["cache_misses"] += 1
 
         if response_time is not None:
-            self.stats["llm_calls"]["response_times"].append(
-                {
-                    "stage": stage_name,
-                    "module": module_name,
-                    "time": response_time,
-                    "cache_hit": cache_hit,
-                }
-            )
+            self._rt_stages.append(stage_name)
+            self._rt_modules.append(module_name)
+            self._rt_times.append(response_time)
+            self._rt_cache_hits.append(cache_hit)
+            self._llm_time_sum += response_time
 
         # Track token usage if available
-        if isinstance(input_tokens, int):
-            self.stats["llm_calls"]["input_tokens"] += max(0, input_tokens)
-        if isinstance(output_tokens, int):
-            self.stats["llm_calls"]["output_tokens"] += max(0, output_tokens)
-        if (isinstance(input_tokens, int)) or (isinstance(output_tokens, int)):
-            self.stats["llm_calls"]["by_call"].append(
-                {
-                    "stage": stage_name,
-                    "module": module_name,
-                    "input_tokens": input_tokens,
-                    "output_tokens": output_tokens,
-                    "cache_hit": cache_hit,
-                    "time": response_time,
-                }
-            )
+        if input_tokens > 0:
+            llm_calls["input_tokens"] += input_tokens
+        if output_tokens > 0:
+            llm_calls["output_tokens"] += output_tokens
+        if has_token_info and self._record_per_call:
+            self._call_stages.append(stage_name)
+            self._call_modules.append(module_name)
+            self._call_input_tokens.append(input_tokens)
+            self._call_output_tokens.append(output_tokens)
+            self._call_cache_hits.append(cache_hit)
+            self._call_times.append(response_time)
 
         # Update stage-specific LLM call count
-        if stage_name in self.stats["stages"]:
-            self.stats["stages"][stage_name]["llm_calls"] += 1
+        stage_stats = self.stats["stages"].get(stage_name)
+        if stage_stats is not None:
+            stage_stats["llm_calls"] += 1
 
     def record_iteration(self, module: str):
         """
@@ -260,7 +311,8 @@ class StatisticsCollector:
             round_number: The repair round number
         """
         self.stats["repairs"]["total_rounds"] = round_number
-        self.logger.debug(f"Statistics: Started repair round {round_number}")
+        if self._debug_enabled:
+            self.logger.debug(f"Statistics: Started repair round {round_number}")
 
     def record_repair(
         self,
@@ -328,11 +380,12 @@ class StatisticsCollector:
         self.stats["errors"]["initial_error_count"] = eval_score.errors
 
         if failures:
-            for failure in failures:
-                error_type = (
-                    failure.error.name if hasattr(failure.error, "name") else str(failure.error)
-                )
-                self.stats["errors"]["errors_by_type"][error_type] += 1
+            # Counter.update adds counts, so the whole batch is tallied in
+            # one C-level pass instead of a per-failure increment loop.
+            self.stats["errors"]["errors_by_type"].update(
+                failure.error.name if hasattr(failure.error, "name") else str(failure.error)
+                for failure in failures
+            )
 
     def record_final_state(self, code: str, eval_score: EvalScore, failures: List = None):
         """
@@ -356,9 +409,10 @@ class StatisticsCollector:
         final_length = self.stats["code_metrics"]["final_code_length"]
         self.stats["code_metrics"]["code_changes"] = abs(final_length - initial_length)
 
-        # Record final time
-        self.stats["end_time"] = datetime.now().isoformat()
-        self.stats["total_execution_time"] = time.time() - self.start_time
+        # Record final time (single clock read; ISO rendering happens in save)
+        now = time.time()
+        self.stats["end_time"] = now
+        self.stats["total_execution_time"] = now - self.start_time
 
     def get_summary(self) -> Dict[str, Any]:
         """
@@ -367,9 +421,8 @@ class StatisticsCollector:
         Returns:
             Dictionary containing summary statistics
         """
-        # Calculate average response times
-        response_times = [rt["time"] for rt in self.stats["llm_calls"]["response_times"]]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
+        # Calculate average response time from the rolling sum (O(1))
+        avg_response_time = self._llm_time_sum / len(self._rt_times) if self._rt_times else 0
 
         # Calculate repair success rate
         total_repairs = self.stats["repairs"]["total_repairs"]
@@ -406,16 +459,53 @@ class StatisticsCollector:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         detailed_file = self.stats_dir / f"detailed_{self.benchmark_name}_{timestamp}.json"
 
-        # Convert defaultdicts to regular dicts for JSON serialization
-        stats_to_save = json.loads(
-            json.dumps(
+        # Render epoch-float timestamps (recorded on the hot path) to the ISO
+        # strings the JSON/report format expects.
+        if isinstance(self.stats["end_time"], float):
+            self.stats["end_time"] = datetime.fromtimestamp(self.stats["end_time"]).isoformat()
+        for stage_data in self.stats["stages"].values():
+            for key in ("start_time", "end_time"):
+                if isinstance(stage_data[key], float):
+                    stage_data[key] = datetime.fromtimestamp(stage_data[key]).isoformat()
+
+        # Materialize the per-call dict rows from the columnar buffers.
+        self.stats["llm_calls"]["response_times"] = [
+            {"stage": s, "module": m, "time": t, "cache_hit": bool(h)}
+            for s, m, t, h in zip(
+                self._rt_stages, self._rt_modules, self._rt_times, self._rt_cache_hits
+            )
+        ]
+        self.stats["llm_calls"]["by_call"] = [
+            {
+                "stage": s,
+                "module": m,
+                "input_tokens": it,
+                "output_tokens": ot,
+                "cache_hit": bool(h),
+                "time": t,
+            }
+            for s, m, it, ot, h, t in zip(
+                self._call_stages,
+                self._call_modules,
+                self._call_input_tokens,
+                self._call_output_tokens,
+                self._call_cache_hits,
+                self._call_times,
+            )
+        ]
+
+        # Serialize in one pass; the default hook coerces defaultdicts as they
+        # are encountered, so no intermediate encode/decode round trip (and no
+        # full copy of the stats tree) is needed.
+        # json.dump emits many small writes for indented output; a 1MB buffer
+        # keeps the detailed stats file to a handful of syscalls.
+        with open(detailed_file, "w", buffering=1 << 20) as f:
+            json.dump(
                 self.stats,
+                f,
+                indent=2,
                 default=lambda x: dict(x) if isinstance(x, defaultdict) else x,
             )
-        )
-
-        with open(detailed_file, "w") as f:
-            json.dump(stats_to_save, f, indent=2)
 
         self.logger.info(f"Saved detailed statistics to {detailed_file}")
 
@@ -441,88 +531,98 @@ class StatisticsCollector:
             report_file: Path to save the report
             summary: Summary statistics dictionary
         """
+        # Assemble the report in memory and write it in one call rather than
+        # ~40 small f.write()s against the file handle.
+        parts = []
+        parts.append("=" * 80 + "\n")
+        parts.append(f"VeriStruct Statistics Report - {self.benchmark_name}\n")
+        parts.append("=" * 80 + "\n\n")
+
+        # Execution Summary
+        parts.append("EXECUTION SUMMARY\n")
+        parts.append("-" * 80 + "\n")
+        parts.append(f"Benchmark: {self.benchmark_name}\n")
+        parts.append(f"Start Time: {self.stats['start_time']}\n")
+        parts.append(f"End Time: {self.stats.get('end_time', 'N/A')}\n")
+        parts.append(f"Total Execution Time: {summary['execution_time']:.2f}s\n")
+        parts.append(f"Verification Success: {'Yes' if summary['verification_success'] else 'No'}\n")
+        parts.append("\n")
+
+        # Module Activation
+        parts.append("MODULE ACTIVATION\n")
+        parts.append("-" * 80 + "\n")
+        parts.append(f"Total Modules Activated: {summary['modules_activated']}\n")
+        parts.append("Modules: " + ", ".join(self.stats["modules_activated"]) + "\n")
+        parts.append("\n")
+
+        # LLM Calls
+        parts.append("LLM CALLS\n")
+        parts.append("-" * 80 + "\n")
+        parts.append(f"Total LLM Calls: {summary['total_llm_calls']}\n")
+        parts.append(f"Average Response Time: {summary['avg_response_time']:.2f}s\n")
+        parts.append(f"Cache Hit Rate: {summary['cache_hit_rate']:.2f}%\n")
+        parts.append("\nCalls by Stage:\n")
+        by_stage = self.stats["llm_calls"]["by_stage"]
+        for stage in sorted(by_stage):
+            parts.append(f"  {stage}: {by_stage[stage]}\n")
+        parts.append("\n")
+
+        # Iterations
+        parts.append("ITERATIONS\n")
+        parts.append("-" * 80 + "\n")
+        parts.append("Iterations by Module:\n")
+        iter_by_module = self.stats["iterations"]["by_module"]
+        for module in sorted(iter_by_module):
+            parts.append(f"  {module}: {iter_by_module[module]}\n")
+        parts.append("\n")
+
+        # Repairs
+        parts.append("REPAIRS\n")
+        parts.append("-" * 80 + "\n")
+        parts.append(f"Total Repair Rounds: {summary['total_repair_rounds']}\n")
+        parts.append(f"Total Repairs: {summary['total_repairs']}\n")
+        parts.append(f"Successful Repairs: {self.stats['repairs']['successful_repairs']}\n")
+        parts.append(f"Failed Repairs: {self.stats['repairs']['failed_repairs']}\n")
+        parts.append(f"Success Rate: {summary['repair_success_rate']:.2f}%\n")
+        parts.append("\nRepairs by Error Type:\n")
+        repairs_by_type = self.stats["repairs"]["repairs_by_type"]
+        for error_type in sorted(repairs_by_type):
+            parts.append(f"  {error_type}: {repairs_by_type[error_type]}\n")
+        parts.append("\nRepairs by Heuristic:\n")
+        repairs_by_heuristic = self.stats["repairs"]["repairs_by_heuristic"]
+        for heuristic in sorted(repairs_by_heuristic):
+            parts.append(f"  {heuristic}: {repairs_by_heuristic[heuristic]}\n")
+        parts.append("\n")
+
+        # Error Tracking
+        parts.append("ERROR TRACKING\n")
+        parts.append("-" * 80 + "\n")
+        parts.append(f"Initial Errors: {summary['initial_errors']}\n")
+        parts.append(f"Final Errors: {summary['final_errors']}\n")
+        parts.append(f"Errors Fixed: {summary['errors_fixed']}\n")
+        parts.append("\nInitial Errors by Type:\n")
+        errors_by_type = self.stats["errors"]["errors_by_type"]
+        for error_type in sorted(errors_by_type):
+            parts.append(f"  {error_type}: {errors_by_type[error_type]}\n")
+        parts.append("\n")
+
+        # Stage Details
+        parts.append("STAGE DETAILS\n")
+        parts.append("-" * 80 + "\n")
+        for stage_name, stage_data in sorted(
+            self.stats["stages"].items(), key=lambda x: x[1]["step_number"]
+        ):
+            parts.append(f"\n{stage_name} (Step {stage_data['step_number']})\n")
+            parts.append(f"  Execution Time: {stage_data.get('execution_time', 0):.2f}s\n")
+            parts.append(f"  LLM Calls: {stage_data['llm_calls']}\n")
+            parts.append(f"  Iterations: {stage_data['iterations']}\n")
+            if stage_data.get("result"):
+                result = stage_data["result"]
+                parts.append(f"  Result: Verified={result['verified']}, Errors={result['errors']}\n")
+
+        parts.append("\n" + "=" * 80 + "\n")
+
         with open(report_file, "w") as f:
-            f.write("=" * 80 + "\n")
-            f.write(f"VeriStruct Statistics Report - {self.benchmark_name}\n")
-            f.write("=" * 80 + "\n\n")
-
-            # Execution Summary
-            f.write("EXECUTION SUMMARY\n")
-            f.write("-" * 80 + "\n")
-            f.write(f"Benchmark: {self.benchmark_name}\n")
-            f.write(f"Start Time: {self.stats['start_time']}\n")
-            f.write(f"End Time: {self.stats.get('end_time', 'N/A')}\n")
-            f.write(f"Total Execution Time: {summary['execution_time']:.2f}s\n")
-            f.write(f"Verification Success: {'Yes' if summary['verification_success'] else 'No'}\n")
-            f.write("\n")
-
-            # Module Activation
-            f.write("MODULE ACTIVATION\n")
-            f.write("-" * 80 + "\n")
-            f.write(f"Total Modules Activated: {summary['modules_activated']}\n")
-            f.write("Modules: " + ", ".join(self.stats["modules_activated"]) + "\n")
-            f.write("\n")
-
-            # LLM Calls
-            f.write("LLM CALLS\n")
-            f.write("-" * 80 + "\n")
-            f.write(f"Total LLM Calls: {summary['total_llm_calls']}\n")
-            f.write(f"Average Response Time: {summary['avg_response_time']:.2f}s\n")
-            f.write(f"Cache Hit Rate: {summary['cache_hit_rate']:.2f}%\n")
-            f.write("\nCalls by Stage:\n")
-            for stage, count in sorted(self.stats["llm_calls"]["by_stage"].items()):
-                f.write(f"  {stage}: {count}\n")
-            f.write("\n")
-
-            # Iterations
-            f.write("ITERATIONS\n")
-            f.write("-" * 80 + "\n")
-            f.write("Iterations by Module:\n")
-            for module, count in sorted(self.stats["iterations"]["by_module"].items()):
-                f.write(f"  {module}: {count}\n")
-            f.write("\n")
-
-            # Repairs
-            f.write("REPAIRS\n")
-            f.write("-" * 80 + "\n")
-            f.write(f"Total Repair Rounds: {summary['total_repair_rounds']}\n")
-            f.write(f"Total Repairs: {summary['total_repairs']}\n")
-            f.write(f"Successful Repairs: {self.stats['repairs']['successful_repairs']}\n")
-            f.write(f"Failed Repairs: {self.stats['repairs']['failed_repairs']}\n")
-            f.write(f"Success Rate: {summary['repair_success_rate']:.2f}%\n")
-            f.write("\nRepairs by Error Type:\n")
-            for error_type, count in sorted(self.stats["repairs"]["repairs_by_type"].items()):
-                f.write(f"  {error_type}: {count}\n")
-            f.write("\nRepairs by Heuristic:\n")
-            for heuristic, count in sorted(self.stats["repairs"]["repairs_by_heuristic"].items()):
-                f.write(f"  {heuristic}: {count}\n")
-            f.write("\n")
-
-            # Error Tracking
-            f.write("ERROR TRACKING\n")
-            f.write("-" * 80 + "\n")
-            f.write(f"Initial Errors: {summary['initial_errors']}\n")
-            f.write(f"Final Errors: {summary['final_errors']}\n")
-            f.write(f"Errors Fixed: {summary['errors_fixed']}\n")
-            f.write("\nInitial Errors by Type:\n")
-            for error_type, count in sorted(self.stats["errors"]["errors_by_type"].items()):
-                f.write(f"  {error_type}: {count}\n")
-            f.write("\n")
-
-            # Stage Details
-            f.write("STAGE DETAILS\n")
-            f.write("-" * 80 + "\n")
-            for stage_name, stage_data in sorted(
-                self.stats["stages"].items(), key=lambda x: x[1]["step_number"]
-            ):
-                f.write(f"\n{stage_name} (Step {stage_data['step_number']})\n")
-                f.write(f"  Execution Time: {stage_data.get('execution_time', 0):.2f}s\n")
-                f.write(f"  LLM Calls: {stage_data['llm_calls']}\n")
-                f.write(f"  Iterations: {stage_data['iterations']}\n")
-                if stage_data.get("result"):
-                    result = stage_data["result"]
-                    f.write(f"  Result: Verified={result['verified']}, Errors={result['errors']}\n")
-
-            f.write("\n" + "=" * 80 + "\n")
+            f.write("".join(parts))
 
         self.logger.info(f"Saved human-readable report to {report_file}")
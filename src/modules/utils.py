@@ -5,12 +5,15 @@ This module provides shared functionality used across different inference and re
 particularly for writing, evaluating, and scoring code samples.
 """
 
+import json
 import logging
 import os
 import re
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
@@ -30,6 +33,65 @@ from src.modules.lynette import (  # Provides code_detect_nonlinear, code_merge_
 from src.modules.veval import EvalScore, VerusErrorType, VEval
 
 
+# RAM-backed scratch directory for the short-lived .rs files handed to
+# Lynette and Verus. Their contents never need to persist, so writing them to
+# tmpfs avoids disk traffic entirely; None falls back to the default temp dir
+# on systems without a writable /dev/shm.
+_SCRATCH_TMPDIR = (
+    "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    Write text to a file atomically (temp file in the same directory + rename).
+
+    Output files such as the per-module "best" snapshots may be read by other
+    processes (or a crashed run may be resumed) while a write is in flight;
+    os.replace guarantees readers see either the old or the new content,
+    never a partial write. Encoding and newlines are pinned so output is
+    byte-identical regardless of locale and platform.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _write_code_with_score(
+    path: Path, code: str, score, label: str = "VEval Score", atomic: bool = False
+) -> None:
+    """
+    Write code plus a trailing score comment without building a combined copy.
+
+    With atomic=True the write goes through a temp file and os.replace, as in
+    atomic_write_text — used for durable artifacts like the checkpoint best,
+    which must never be left torn by a crash or a concurrent writer.
+    """
+    if atomic:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(code)
+                f.write(f"\n\n// {label}: {score}")
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return
+    with open(path, "w") as f:
+        f.write(code)
+        f.write(f"\n\n// {label}: {score}")
+
+
 def write_candidate_code(
     sample: str,
     veval: VEval,
@@ -51,20 +113,55 @@ def write_candidate_code(
         idx: Index of the sample
         logger: Logger instance
     """
-    output_dir.mkdir(exist_ok=True, parents=True)
     sample_path = output_dir / f"{prefix}_sample_{idx}.rs"
 
     try:
-        # Append the score at the end of the file
-        sample_with_score = f"{sample}\n\n// VEval Score: {score}"
-        sample_path.write_text(sample_with_score)
+        # Stringify the score once for both the file suffix and the log line.
+        score_str = str(score)
+        _write_code_with_score(sample_path, sample, score_str)
         logger.info(
-            f"Saved {prefix} sample {idx} to {output_dir}/{prefix}_sample_{idx}.rs (score: {score})"
+            f"Saved {prefix} sample {idx} to {output_dir}/{prefix}_sample_{idx}.rs (score: {score_str})"
         )
     except Exception as e:
         logger.error(f"Error saving sample {idx}: {e}")
 
 
+# Content-hash cache of evaluation results: LLM sampling regularly returns
+# exact-duplicate candidates across samples and retry rounds, and each miss
+# costs a full Verus verifier run. Keyed by (code digest, max_errs).
+_veval_cache: Dict[Tuple[bytes, int], Tuple[VEval, EvalScore]] = {}
+
+
+def _eval_code_cached(
+    code: str, logger: logging.Logger, max_errs: int = 5
+) -> Tuple[VEval, EvalScore]:
+    """Evaluate code with VEval, reusing the cached result for duplicates."""
+    cache_key = (blake2b(code.encode(), digest_size=16).digest(), max_errs)
+    cached = _veval_cache.get(cache_key)
+    if cached is not None:
+        logger.info("Reusing cached VEval result for duplicate sample")
+        return cached
+    # Trivially malformed samples (empty/truncated output, or no function at
+    # all) can never verify; give them a worst-case score without paying for
+    # a Verus run.
+    if len(code.strip()) < 16 or "fn " not in code:
+        logger.info("Skipping Verus run for trivially malformed sample")
+        veval = VEval(code, logger)
+        veval.compilation_error = True
+        # Stub a failed result so accessors such as get_failures() behave as
+        # they would after a real run; without it they raise "No Verus result"
+        # on the never-evaluated instance.
+        veval.verus_result = {"verification-results": {"success": False}}
+        result = (veval, EvalScore(0, 0, True))
+        _veval_cache[cache_key] = result
+        return result
+    veval = VEval(code, logger)
+    veval.eval(max_errs=max_errs)
+    result = (veval, veval.get_score())
+    _veval_cache[cache_key] = result
+    return result
+
+
 def evaluate_samples(
     samples: List[str],
     output_dir: Path,
@@ -76,8 +173,12 @@ def evaluate_samples(
     Evaluates multiple code samples using VEval, writes them to files with scores,
     and returns the best sample, its score if available, and all scores.
 
+    Samples may be any iterable (list or generator); they are consumed lazily
+    and a running best is maintained, so a caller can feed samples as they
+    become available instead of materializing the full batch first.
+
     Args:
-        samples: List of code samples to evaluate
+        samples: Iterable of code samples to evaluate
         output_dir: Directory to write the samples to
         prefix: Prefix for the filenames
         logger: Logger instance
@@ -86,49 +187,72 @@ def evaluate_samples(
     Returns:
         Tuple containing (best_code, best_score if available, all_scores)
     """
-    if not samples:
-        logger.error("No samples provided for evaluation")
-        return "", None, []
+    # Ensure the output directory exists once, rather than re-checking it in
+    # write_candidate_code for every sample.
+    output_dir.mkdir(exist_ok=True, parents=True)
 
-    best_code = samples[0]  # Default to first sample
+    best_code = ""
     best_score: Optional[EvalScore] = None
+    best_idx = 0
     scores: List[EvalScore] = []
 
     logger.info(f"Scoring generated {prefix} samples using VEval...")
-    for i, sample in enumerate(samples):
-        try:
-            veval = VEval(sample, logger)
-            veval.eval(max_errs=max_errs)
-            score = veval.get_score()
-            scores.append(score)
-
-            # Write the sample with its score
-            write_candidate_code(sample, veval, score, output_dir, prefix, i + 1, logger)
-
-            # Log the score details
-            logger.info(f"Sample {i+1} score: {score}")
-
-            # Update best if this is better
-            if best_score is None or score > best_score:
-                best_score = score
-                best_code = sample
-                logger.info(f"New best sample: {i+1}")
-
-            # If code is correct according to VEval, we can stop early
-            if score.is_correct():
-                logger.info(f"Found a correct proof in sample {i+1}!")
-                # Save a special 'correct' version
-                correct_path = output_dir / f"{prefix}_correct.rs"
-                correct_path.write_text(sample)
-                logger.info(f"Correct proof saved to {output_dir}/{prefix}_correct.rs")
-                break
 
-        except Exception as e:
-            logger.error(f"Error scoring sample {i+1}: {e}")
+    def _eval_one(sample: str) -> Tuple[VEval, EvalScore]:
+        return _eval_code_cached(sample, logger, max_errs)
+
+    # Each evaluation shells out to the Verus verifier, so the per-sample
+    # runs are subprocess-bound and independent — dispatch them to a thread
+    # pool and consume the results in submission order so best-selection and
+    # file naming stay deterministic.
+    sample_list: List[str] = []
+    futures = []
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        for sample in samples:
+            sample_list.append(sample)
+            futures.append(executor.submit(_eval_one, sample))
+
+        for i, (sample, future) in enumerate(zip(sample_list, futures)):
+            if i == 0:
+                best_code = sample  # Default to first sample
+            try:
+                veval, score = future.result()
+                scores.append(score)
+
+                # Write the sample with its score
+                write_candidate_code(sample, veval, score, output_dir, prefix, i + 1, logger)
+
+                # Log the score details
+                logger.info(f"Sample {i+1} score: {score}")
+
+                # Update best if this is better
+                if best_score is None or score > best_score:
+                    best_score = score
+                    best_code = sample
+                    best_idx = i
+                    logger.info(f"New best sample: {i+1}")
+
+                # If code is correct according to VEval, we can stop early
+                # (in-flight evaluations finish in the background but their
+                # results are not consumed)
+                if score.is_correct():
+                    logger.info(f"Found a correct proof in sample {i+1}!")
+                    # Save a special 'correct' version
+                    correct_path = output_dir / f"{prefix}_correct.rs"
+                    correct_path.write_text(sample)
+                    logger.info(f"Correct proof saved to {output_dir}/{prefix}_correct.rs")
+                    break
+
+            except Exception as e:
+                logger.error(f"Error scoring sample {i+1}: {e}")
+
+    if not sample_list:
+        logger.error("No samples provided for evaluation")
+        return "", None, []
 
     # Save the selected sample with details if available
     if best_score is not None:
-        save_selection_info(output_dir, prefix, scores, best_score, logger)
+        save_selection_info(output_dir, prefix, scores, best_score, logger, best_idx=best_idx)
     else:
         logger.warning("No valid scores generated; selection info not saved.")
 
@@ -141,6 +265,7 @@ def save_selection_info(
     scores: List[EvalScore],
     best_score: EvalScore,
     logger: logging.Logger,
+    best_idx: Optional[int] = None,
 ) -> None:
     """
     Saves selection information to a text file.
@@ -151,13 +276,19 @@ def save_selection_info(
         scores: List of all scores
         best_score: The best score
         logger: Logger instance
+        best_idx: 0-based index of the best sample, if the caller tracked it
     """
     selected_path = output_dir / f"{prefix}_selected.txt"
     try:
-        best_idx = [str(s) for s in scores].index(str(best_score)) + 1
-        selection_info = (
-            f"Selected sample: {best_idx}\nScore: {best_score}\n\nAll scores:\n"
-            + "\n".join([f"Sample {i+1}: {s}" for i, s in enumerate(scores)])
+        # Fall back to a scan only when the caller did not track the index.
+        if best_idx is None:
+            best_idx = [str(s) for s in scores].index(str(best_score))
+        best_idx += 1
+        # Single join over all lines pre-sizes the result buffer once instead
+        # of concatenating a header string onto the joined body.
+        selection_info = "\n".join(
+            [f"Selected sample: {best_idx}", f"Score: {best_score}", "", "All scores:"]
+            + [f"Sample {i+1}: {s}" for i, s in enumerate(scores)]
         )
         selected_path.write_text(selection_info)
         logger.info(
@@ -183,11 +314,18 @@ def check_and_handle_success(code: str, logger: logging.Logger) -> bool:
     Returns:
         True if the code is correct, False otherwise
     """
-    veval = VEval(code, logger)
-    score = veval.eval_and_get_score()
+    _, score = _eval_code_cached(code, logger)
     return score.is_correct()
 
 
+# Patterns for _check_view_quality's struct-vs-view heuristic, compiled once.
+_STRUCT_BODY_RE = re.compile(r"(?:pub\s+)?struct\s+\w+[^{]*\{([^}]+)\}", re.DOTALL)
+_LINE_COMMENT_RE = re.compile(r"//.*?$", re.MULTILINE)
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_STRUCT_FIELD_RE = re.compile(r"(\w+)\s*:\s*[^,}]+")
+_VIEW_TYPE_RE = re.compile(r"type\s+V\s*=\s*([^;]+);")
+
+
 def _check_view_quality(code: str) -> int:
     """
     Quick heuristic to assess view quality for tiebreaking.
@@ -197,32 +335,28 @@ def _check_view_quality(code: str) -> int:
         1 = potentially non-trivial (tuple size < field count or non-tuple)
         -1 = cannot determine
     """
-    import re
-
     try:
         # Count struct fields
-        struct_pattern = r"(?:pub\s+)?struct\s+\w+[^{]*\{([^}]+)\}"
-        struct_matches = re.findall(struct_pattern, code, re.DOTALL)
+        struct_matches = _STRUCT_BODY_RE.findall(code)
         if not struct_matches:
             return -1
 
         struct_body = struct_matches[0]
-        cleaned = re.sub(r"//.*?$", "", struct_body, flags=re.MULTILINE)
-        cleaned = re.sub(r"/\*.*?\*/", "", cleaned, flags=re.DOTALL)
-        fields = re.findall(r"(\w+)\s*:\s*[^,}]+", cleaned)
+        cleaned = _LINE_COMMENT_RE.sub("", struct_body)
+        cleaned = _BLOCK_COMMENT_RE.sub("", cleaned)
+        fields = _STRUCT_FIELD_RE.findall(cleaned)
         struct_field_count = len([f.strip() for f in fields if f.strip()])
 
         if struct_field_count == 0:
             return -1
 
         # Extract view type
-        view_type_pattern = r"type\s+V\s*=\s*([^;]+);"
-        view_type_match = re.search(view_type_pattern, code)
+        view_type_match = _VIEW_TYPE_RE.search(code)
         if not view_type_match:
             return -1
 
         view_type = view_type_match.group(1).strip()
-        view_type_clean = re.sub(r"/\*.*?\*/", "", view_type)
+        view_type_clean = _BLOCK_COMMENT_RE.sub("", view_type)
 
         # Count tuple elements
         if view_type_clean.startswith("(") and view_type_clean.endswith(")"):
@@ -267,13 +401,17 @@ def update_checkpoint_best(
     Returns:
         Tuple of (updated_best_score, updated_best_code)
     """
-    veval = VEval(cand_code, logger)
-    score = veval.eval_and_get_score()
-
-    # Debug logging
-    logger.debug(f"update_checkpoint_best - Candidate score: {score}")
-    logger.debug(f"update_checkpoint_best - Current best score: {best_score_of_all}")
-    logger.debug(f"update_checkpoint_best - Has best code: {best_code_of_all is not None}")
+    _, score = _eval_code_cached(cand_code, logger)
+    # Stringify once; the score is logged and written several times below.
+    score_str = str(score)
+
+    # Debug logging. The f-strings below stringify scores even when DEBUG is
+    # off, so gate them on the level; loguru loggers lack isEnabledFor and
+    # always emit.
+    if not hasattr(logger, "isEnabledFor") or logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"update_checkpoint_best - Candidate score: {score_str}")
+        logger.debug(f"update_checkpoint_best - Current best score: {best_score_of_all}")
+        logger.debug(f"update_checkpoint_best - Has best code: {best_code_of_all is not None}")
 
     # Make sure the directory exists
     if not temp_dir.exists():
@@ -281,26 +419,29 @@ def update_checkpoint_best(
 
     # If best_score_of_all is None, set it to current score
     if best_score_of_all is None:
-        logger.info(f"Initializing checkpoint best with score: {score}")
+        logger.info(f"Initializing checkpoint best with score: {score_str}")
         best_score_of_all = score
         best_code_of_all = cand_code
 
         # Write to best.rs file
         best_path = temp_dir / "best.rs"
-        sample_with_score = f"{best_code_of_all}\n\n// Checkpoint Best Score: {score}"
-        best_path.write_text(sample_with_score)
+        _write_code_with_score(
+            best_path, best_code_of_all, score_str, label="Checkpoint Best Score", atomic=True
+        )
         return best_score_of_all, best_code_of_all
 
-    # Compare scores
+    # Compare scores with a single three-way dispatch (better / tied / worse)
     try:
-        is_better = score > best_score_of_all
+        cmp_result = score.cmp(best_score_of_all)
+        is_better = cmp_result > 0
         logger.debug(f"update_checkpoint_best - Candidate is better than current best: {is_better}")
     except Exception as e:
         logger.error(f"Error comparing scores: {e}")
+        cmp_result = -1
         is_better = False
 
     # TIEBREAKER: If scores are equal, prefer non-trivial views and newer code
-    if not is_better and score == best_score_of_all:
+    if not is_better and cmp_result == 0:
         cand_quality = _check_view_quality(cand_code)
         best_quality = _check_view_quality(best_code_of_all) if best_code_of_all else 0
 
@@ -319,22 +460,26 @@ def update_checkpoint_best(
             )
 
     if is_better:
+        previous_best_code = best_code_of_all
         best_score_of_all = score
         best_code_of_all = cand_code
 
-        # Write to best.rs file
+        # Write to best.rs file. The "prefer newer" tiebreaker means the same
+        # code can win repeatedly; skip the rewrite when the content on disk
+        # would be unchanged.
         best_path = temp_dir / "best.rs"
-        sample_with_score = f"{best_code_of_all}\n\n// Checkpoint Best Score: {score}"
-        best_path.write_text(sample_with_score)
-        logger.info(f"Updated checkpoint best with score: {score}")
+        if cand_code != previous_best_code or not best_path.exists():
+            _write_code_with_score(
+                best_path, best_code_of_all, score_str, label="Checkpoint Best Score", atomic=True
+            )
+        logger.info(f"Updated checkpoint best with score: {score_str}")
     else:
         # Even if not better, ensure the best.rs file exists with the current best
         best_path = temp_dir / "best.rs"
         if not best_path.exists() and best_code_of_all is not None:
-            sample_with_score = (
-                f"{best_code_of_all}\n\n// Checkpoint Best Score: {best_score_of_all}"
+            _write_code_with_score(
+                best_path, best_code_of_all, best_score_of_all, label="Checkpoint Best Score", atomic=True
             )
-            best_path.write_text(sample_with_score)
             logger.info(
                 f"Created best.rs file with existing checkpoint best score: {best_score_of_all}"
             )
@@ -352,6 +497,7 @@ def evaluate_candidates(
     temp_dir: Path,
     logger: logging.Logger,
     debug_type_error_fn: Optional[Callable] = None,
+    aggregate_candidates: bool = True,
 ) -> Tuple[str, str, EvalScore]:
     """
     Evaluates multiple candidate codes generated by a single function.
@@ -367,14 +513,19 @@ def evaluate_candidates(
         temp_dir: Directory to save files to
         logger: Logger instance
         debug_type_error_fn: Optional function to debug and fix type errors
+        aggregate_candidates: Append candidates to one shared JSONL file
+            instead of writing one .rs file each (default True)
 
     Returns:
         Tuple of (candidate_code, best_code, best_score)
     """
+    # Ensure the output directory exists once, before any per-candidate writes.
+    temp_dir.mkdir(exist_ok=True, parents=True)
+
     best_score = EvalScore.get_worst_score()
     best_code = last_best_code
 
-    for j, cand in enumerate(candidates):
+    def _fix_and_eval(cand: str) -> Tuple[str, EvalScore]:
         # Use our new debug_type_error function if no external one is provided
         if debug_type_error_fn:
             cand, _ = debug_type_error_fn(cand)
@@ -383,26 +534,58 @@ def evaluate_candidates(
             if cand_fixed:  # Only use the fixed version if it's not empty
                 cand = cand_fixed
 
-        veval = VEval(cand, logger)
-        score = veval.eval_and_get_score()
+        _, score = _eval_code_cached(cand, logger)
+        return cand, score
 
-        # If code is correct according to VEval
-        if score.is_correct():
-            logger.info("Found a correct proof!")
-            correct_path = temp_dir / f"{prefix}_correct.rs"
-            sample_with_score = f"{cand}\n\n// VEval Score: {score}"
-            correct_path.write_text(sample_with_score)
-            return cand, cand, score
+    # A deep refinement tree produces thousands of per-candidate .rs files,
+    # each costing an open/write/close. By default candidates are instead
+    # appended as rows to one shared JSONL file held open for the loop.
+    candidates_log = None
+    if aggregate_candidates:
+        candidates_log = open(temp_dir / f"{prefix}_candidates.jsonl", "a", buffering=1 << 16)
 
-        # Update the best candidate if needed
-        if not (score < best_score):
-            best_score = score
-            best_code = cand
-
-        # Write each candidate's code to a temp file
-        candidate_path = temp_dir / f"{prefix}_{iteration_idx}_{func_name}_{j}.rs"
-        sample_with_score = f"{cand}\n\n// VEval Score: {score}"
-        candidate_path.write_text(sample_with_score)
+    # Type-error fixup and scoring both shell out to Verus, so candidates are
+    # processed on a thread pool; results are consumed in submission order to
+    # keep best-selection and file naming deterministic.
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            futures = [executor.submit(_fix_and_eval, cand) for cand in candidates]
+
+            for j, future in enumerate(futures):
+                cand, score = future.result()
+
+                # If code is correct according to VEval
+                if score.is_correct():
+                    logger.info("Found a correct proof!")
+                    _write_code_with_score(temp_dir / f"{prefix}_correct.rs", cand, score)
+                    return cand, cand, score
+
+                # Update the best candidate if needed (ties favor the newer one)
+                if score.cmp(best_score) >= 0:
+                    best_score = score
+                    best_code = cand
+
+                # Record each candidate's code, either as a JSONL row or in
+                # its own temp file
+                if candidates_log is not None:
+                    candidates_log.write(
+                        json.dumps(
+                            {
+                                "iter": iteration_idx,
+                                "func": func_name,
+                                "j": j,
+                                "score": str(score),
+                                "code": cand,
+                            }
+                        )
+                        + "\n"
+                    )
+                else:
+                    candidate_path = temp_dir / f"{prefix}_{iteration_idx}_{func_name}_{j}.rs"
+                    _write_code_with_score(candidate_path, cand, score)
+    finally:
+        if candidates_log is not None:
+            candidates_log.close()
 
     # Return the best after evaluating all candidates of this func
     if best_score.is_good_code_next_phase(last_best_score):
@@ -411,6 +594,33 @@ def evaluate_candidates(
         return last_best_code, last_best_code, last_best_score
 
 
+def _is_parenthesized(expr):
+    """Whether expr is fully wrapped by a single pair of parentheses.
+
+    True only when the "(" at index 0 closes at the very last character:
+    "(a + b)" and "(f(x))" qualify, but "(a) + (b)" does not — a cast
+    appended there would bind only to the last term, so the caller still
+    needs to wrap the whole expression.
+    """
+    if not expr.startswith("(") or not expr.endswith(")"):
+        return False
+    depth = 0
+    for i, ch in enumerate(expr):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i == len(expr) - 1
+    return False
+
+
+# Matches a trailing cast ("... as Type") covering the whole expression.
+# "x as int - 1" does not match: the cast there applies to a sub-expression,
+# not the full span, so a new wrapping cast is needed instead.
+_TRAIL_CAST_RE = re.compile(r"\sas\s+\S*\s*$")
+
+
 def fix_one_type_error(oldline, cstart, cend, newtype):
     """
     Fix a type error in a line by inserting an appropriate cast.
@@ -431,28 +641,39 @@ def fix_one_type_error(oldline, cstart, cend, newtype):
     mid = oldline[cstart : cend + 1]
     suffix = oldline[cend + 1 :]
 
-    oldtype_pos = mid.rfind(" as ")
+    cast_match = _TRAIL_CAST_RE.search(mid)
 
-    if oldtype_pos > -1:
-        if " " in mid[oldtype_pos + 4 :].strip():
-            # there was not a cast type for the whole expression
-            # instead it is something like x as int - 1
-            oldtype_pos = -1
-
-    if oldtype_pos == -1:
+    if cast_match is None:
         # the old expression does not have "as oldtype"
-        if re.match(r"^\(*\)$", mid.strip()):
+        if _is_parenthesized(mid.strip()):
             # already in parentheses
             newmid = mid + " as " + newtype
         else:
             newmid = "( " + mid + " ) as " + newtype
     else:
         # replace the old as type
-        newmid = mid[:oldtype_pos] + " as " + newtype
+        newmid = mid[: cast_match.start()] + " as " + newtype
 
     return prefix + newmid + suffix
 
 
+# Error labels for which the automatic "fix" deletes the offending line
+# rather than inserting a cast (see fix_one_type_error_in_code). Deleting a
+# line shifts the line numbers of everything after it, so callers must
+# re-evaluate before applying further fixes from the same error report.
+_LINE_REMOVAL_LABELS = (
+    "no method named `view` found for struct",
+    "cannot call function `vstd::atomic_ghost::impl&%21::load` with mode exec",
+    "cannot call function `vstd::atomic_ghost::impl&%21::store` with mode exec",
+    "no field `ghost` on type",
+)
+
+
+def _is_line_removal_label(err_label) -> bool:
+    """Whether this error label is fixed by removing the whole line."""
+    return err_label is not None and any(marker in err_label for marker in _LINE_REMOVAL_LABELS)
+
+
 def fix_one_type_error_in_code(code, err_trace, verbose=True):
     """
     Fix a type error in the code based on the error trace.
@@ -472,12 +693,7 @@ def fix_one_type_error_in_code(code, err_trace, verbose=True):
     # For this error the simplest automatic fix is to remove the entire line;
     # the LLM-based repair pipeline can then try a different approach later.
     # TODO: this is a hack, we should fix the mutability mismatch in the code instead.
-    if err_label is not None and (
-        "no method named `view` found for struct" in err_label
-        or "cannot call function `vstd::atomic_ghost::impl&%21::load` with mode exec" in err_label
-        or "cannot call function `vstd::atomic_ghost::impl&%21::store` with mode exec" in err_label
-        or "no field `ghost` on type" in err_label
-    ):
+    if _is_line_removal_label(err_label):
         err_lnum = err_trace.get_lines()[0]
         linenum = err_lnum - 1
         logger.info(f"Removing line {err_lnum} due to mutability mismatch.")
@@ -512,44 +728,53 @@ def fix_one_type_error_in_code(code, err_trace, verbose=True):
     cend = err_trace.text[0].hl_end - 2
     err_exp = line[cstart : cend + 1]
 
-    newlines = []
-    for i, line in enumerate(code.split("\n")):
-        if i != linenum:
-            newlines.append(line)
-        else:
-            if not err_exp in line:
-                sys.stderr.write("Fatal error: `" + err_exp + "' does not exist in " + line)
-                return ""
-            if err_exp != line[cstart : cend + 1]:
-                sys.stderr.write(
-                    "Fatal error. Expected expression is `"
-                    + err_exp
-                    + "'; Get expression `"
-                    + line[cstart : cend + 1]
-                )
-                return ""
-
-            newline = fix_one_type_error(line, cstart, cend, newtype)
-
-            # Sometimes, we may encounter non-fixable type error
-            # for example if one expects ..i or [i] to be int, ..i as int or [i] as int will return the same type error
-            # so, we return "" to warn the caller
-            # otherwise, the caller may hang
-            if line == newline:
-                return ""
-
-            if verbose == True:
-                sys.stderr.write(
-                    "[fix_one_type_error_in_code] changed the type of `"
-                    + line[cstart : cend + 1]
-                    + "'"
-                    + "as `"
-                    + newline.strip()
-                    + "'"
-                )
-            newlines.append(newline)
+    # Locate the target line by newline offsets and splice only that line,
+    # instead of rebuilding the whole file through a per-line Python loop.
+    start = 0
+    for _ in range(linenum):
+        next_newline = code.find("\n", start)
+        if next_newline == -1:
+            # Line number past the end of the file; nothing to fix (matches
+            # the old loop, which never reached the target line).
+            return code + "\n"
+        start = next_newline + 1
+    end = code.find("\n", start)
+    if end == -1:
+        end = len(code)
+    line = code[start:end]
+
+    if not err_exp in line:
+        sys.stderr.write("Fatal error: `" + err_exp + "' does not exist in " + line)
+        return ""
+    if err_exp != line[cstart : cend + 1]:
+        sys.stderr.write(
+            "Fatal error. Expected expression is `"
+            + err_exp
+            + "'; Get expression `"
+            + line[cstart : cend + 1]
+        )
+        return ""
 
-    return "\n".join(newlines) + "\n"
+    newline = fix_one_type_error(line, cstart, cend, newtype)
+
+    # Sometimes, we may encounter non-fixable type error
+    # for example if one expects ..i or [i] to be int, ..i as int or [i] as int will return the same type error
+    # so, we return "" to warn the caller
+    # otherwise, the caller may hang
+    if line == newline:
+        return ""
+
+    if verbose == True:
+        sys.stderr.write(
+            "[fix_one_type_error_in_code] changed the type of `"
+            + line[cstart : cend + 1]
+            + "'"
+            + "as `"
+            + newline.strip()
+            + "'"
+        )
+
+    return code[:start] + newline + code[end:] + "\n"
 
 
 def debug_type_error(code: str, verus_error=None, num=1, logger=None) -> tuple:
@@ -574,9 +799,6 @@ def debug_type_error(code: str, verus_error=None, num=1, logger=None) -> tuple:
     rnd = 0
     max_rnd = 10
 
-    # Import the needed class here to avoid circular imports
-    from src.modules.veval import VerusErrorType, VEval
-
     # Handle dummy mode - if verus_error is a string rather than a VerusError object
     if isinstance(verus_error, str):
         logger.warning("Received string error in dummy mode instead of VerusError object")
@@ -594,11 +816,25 @@ def debug_type_error(code: str, verus_error=None, num=1, logger=None) -> tuple:
                 code = newcode
 
     # check if there is any type errors in the code; if so, fix
+    seen_hashes = set()
     while rnd < max_rnd:
         rnd = rnd + 1
 
-        veval = VEval(code, logger)
-        veval.eval()
+        # If a round's fixes reproduce a state we have already been in, the
+        # loop has cycled (e.g. the same line keeps getting the same failed
+        # cast) and every later round would repeat the same edits — stop
+        # instead of burning the remaining rounds.
+        code_hash = blake2b(code.encode(), digest_size=16).digest()
+        if code_hash in seen_hashes:
+            logger.info("Type-error fixing cycled back to a previous state; stopping early.")
+            break
+        seen_hashes.add(code_hash)
+
+        # Route through the shared content-hash cache: the final evaluation
+        # here is of exactly the code the caller (e.g. evaluate_candidates)
+        # will score next, so that re-evaluation becomes a cache hit instead
+        # of a second Verus run.
+        veval, _ = _eval_code_cached(code, logger)
         failures = veval.get_failures()
         if len(failures) == 0:
             logger.info(f"Verus has succeeded.")
@@ -614,12 +850,21 @@ def debug_type_error(code: str, verus_error=None, num=1, logger=None) -> tuple:
 
             if hasattr(cur_failure, "error") and cur_failure.error == VerusErrorType.MismatchedType:
                 has_typeerr = True
-                newcode = fix_one_type_error_in_code(code, cur_failure.trace[0], verbose=False)
+                trace = cur_failure.trace[0]
+                newcode = fix_one_type_error_in_code(code, trace, verbose=False)
                 # when newcode is "", the above function failed to fix any type error
                 if newcode:
                     fixed_typeerr = True
                     code = newcode
-                    break
+                    # Cast fixes splice a single line in place, so the
+                    # remaining failures' positions stay valid and can be
+                    # applied in the same round (a stale trace is rejected by
+                    # the expression check and just skipped). Line-removal
+                    # fixes shift every later line, so stop batching and
+                    # re-run Verus first.
+                    if _is_line_removal_label(trace.strlabel):
+                        break
+                    continue
                 else:
                     # this type error is unfixable, let's move on to next error
                     continue
@@ -645,12 +890,17 @@ def remove_comment(code):
     """
     remove single-line comments in code
     """
-    new_code = ""
-    for line in code.split("\n"):
-        if line.strip().startswith("//"):
-            continue
-        new_code += line + "\n"
-    return new_code
+    # Single join instead of quadratic += concatenation per kept line. An
+    # all-comment input keeps no lines and returns "" just as the loop did.
+    kept = [line for line in code.split("\n") if not line.strip().startswith("//")]
+    return "\n".join(kept) + "\n" if kept else ""
+
+
+# Used by remove_rust_comments: a whole line that is only a '//' comment
+# (removed including its newline), and an inline comment plus any trailing
+# whitespace at the end of a line. [^\S\n] is "whitespace except newline".
+_FULL_COMMENT_LINE_RE = re.compile(r"(?m)^[^\S\n]*//[^\n]*\n?")
+_INLINE_COMMENT_TRAIL_RE = re.compile(r"(?m)[^\S\n]*(?://[^\n]*)?$")
 
 
 def remove_rust_comments(code: str) -> str:
@@ -665,17 +915,13 @@ def remove_rust_comments(code: str) -> str:
     Note: This simple implementation does not handle the case where '//'
     might appear inside a string literal.
     """
-    lines = code.splitlines()
-    new_lines = []
-    for line in lines:
-        # Skip lines that are entirely comments.
-        if re.match(r"^\s*//", line):
-            continue
-        # Remove any inline comment (everything after the first occurrence of '//')
-        # and also strip trailing whitespace.
-        new_line = re.split(r"//", line)[0].rstrip()
-        new_lines.append(new_line)
-    return "\n".join(new_lines)
+    # Two C-level passes over the whole string replace the old per-line loop
+    # with its re.match/re.split pair on every line. The final
+    # splitlines/join normalizes line endings and drops the trailing newline
+    # exactly as the per-line version did.
+    stripped = _FULL_COMMENT_LINE_RE.sub("", code)
+    stripped = _INLINE_COMMENT_TRAIL_RE.sub("", stripped)
+    return "\n".join(stripped.splitlines())
 
 
 # Ported from archive/code/utils.py
@@ -700,7 +946,7 @@ def get_nonlinear_lines(code, logger):
 
         from src.modules.lynette import lynette
 
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".rs", delete=False) as f:
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".rs", delete=False, dir=_SCRATCH_TMPDIR) as f:
             f.write(code)
             f.flush()
 
@@ -729,6 +975,30 @@ def get_nonlinear_lines(code, logger):
         return []
 
 
+def _func_region_hash(code, fname):
+    """
+    Hash of the textual region of `fn fname` in code, or None if it cannot
+    be located. The region runs from the fn keyword through the function's
+    brace-matched closing brace (covering specs and the body), so equal
+    hashes mean the function is byte-identical in both sources. Used as a
+    conservative fast path in code_change_is_safe; any mismatch or lookup
+    failure falls back to the full Lynette extraction.
+    """
+    m = re.search(rf"\bfn\s+{re.escape(fname)}\b", code)
+    if m is None:
+        return None
+    depth = 0
+    for i in range(m.start(), len(code)):
+        ch = code[i]
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return blake2b(code[m.start() : i + 1].encode(), digest_size=16).digest()
+    return None
+
+
 def code_change_is_safe(
     origin_code,
     changed_code,
@@ -739,6 +1009,7 @@ def code_change_is_safe(
     inter=False,
     debug=True,
     immutable_funcs=[],
+    deep=False,
 ):
     # Debug mode override (from original code)
     if debug and os.environ.get("DEBUG_SAFE_CODE_CHANGE"):
@@ -749,31 +1020,77 @@ def code_change_is_safe(
     if origin_code.strip() == changed_code.strip():
         return True
 
+    # Conservative fast path: a function whose raw textual region is
+    # byte-identical in both versions cannot have been changed, so only the
+    # functions whose regions differ (or could not be located) pay for the
+    # Lynette extraction below.
+    funcs_to_check = []
     for func_name in immutable_funcs:
-        # Get function bodies safely, handling potential errors
-        origin_body = get_func_body(origin_code, func_name, util_path, logger)
-        changed_body = get_func_body(changed_code, func_name, util_path, logger)
+        origin_hash = _func_region_hash(origin_code, func_name)
+        if origin_hash is not None and origin_hash == _func_region_hash(changed_code, func_name):
+            continue
+        funcs_to_check.append(func_name)
+
+    # Each body extraction shells out to Lynette (a cargo subprocess), so the
+    # per-function lookups are subprocess-bound and independent: submit all
+    # origin and changed extractions to a thread pool up front instead of
+    # paying two serial cargo runs per immutable function.
+    if funcs_to_check:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            origin_futures = [
+                executor.submit(get_func_body, origin_code, f, util_path, logger)
+                for f in funcs_to_check
+            ]
+            changed_futures = [
+                executor.submit(get_func_body, changed_code, f, util_path, logger)
+                for f in funcs_to_check
+            ]
+            for func_name, origin_future, changed_future in zip(
+                funcs_to_check, origin_futures, changed_futures
+            ):
+                origin_body = origin_future.result()
+                changed_body = changed_future.result()
+
+                if origin_body is None or changed_body is None:
+                    logger.warning(
+                        f"Could not compare immutable function '{func_name}'. Assuming unsafe."
+                    )
+                    return False
 
-        if origin_body is None or changed_body is None:
-            logger.warning(f"Could not compare immutable function '{func_name}'. Assuming unsafe.")
-            return False
+                origin = remove_rust_comments(origin_body)
+                changed = remove_rust_comments(changed_body)
 
-        origin = remove_rust_comments(origin_body)
-        changed = remove_rust_comments(changed_body)
+                if origin != changed:
+                    logger.error(f"Immutable function '{func_name}' was changed")
+                    return False
 
-        if origin != changed:
-            logger.error(f"Immutable function '{func_name}' was changed")
-            return False
+    # The immutable-function check above is the default contract; callers
+    # that need the stronger whole-file semantic comparison can opt in.
+    if deep:
+        return _lynette_deep_compare(
+            origin_code, changed_code, util_path, inter, target_mode, logger
+        )
     return True
+
+
+def _lynette_deep_compare(origin_code, changed_code, util_path, inter, target_mode, logger):
+    """
+    Full-file semantic comparison via Lynette's compare subcommand.
+
+    Returns True when the files compare equal (or when the comparison cannot
+    be run — missing tool, timeout or tool error all default to safe, since
+    this is a stronger supplement to the immutable-function check, not a
+    gatekeeper).
+    """
     try:
         orig_f = tempfile.NamedTemporaryFile(
-            mode="w", delete=False, prefix="llm4v_orig", suffix=".rs"
+            mode="w", delete=False, prefix="llm4v_orig", suffix=".rs", dir=_SCRATCH_TMPDIR
         )
         orig_f.write(origin_code)
         orig_f.close()
 
         changed_f = tempfile.NamedTemporaryFile(
-            mode="w", delete=False, prefix="llm4v_changed", suffix=".rs"
+            mode="w", delete=False, prefix="llm4v_changed", suffix=".rs", dir=_SCRATCH_TMPDIR
         )
         changed_f.write(changed_code)
         changed_f.close()
@@ -806,9 +1123,7 @@ def code_change_is_safe(
             opts = ["-t"]
 
         verus_compare_cmd = (
-            ["cargo", "run", "--manifest-path", cargopath, "--", "compare"]
-            + opts
-            + [orig_f.name, changed_f.name]
+            lynette.command_prefix(cargopath) + ["compare"] + opts + [orig_f.name, changed_f.name]
         )
 
         m = subprocess.run(verus_compare_cmd, capture_output=True, text=True, timeout=30)
@@ -839,10 +1154,30 @@ def code_change_is_safe(
         return True  # Default to safe on any exception
 
 
+# Extracted function bodies keyed by (code digest, function name, util
+# path). code_change_is_safe re-extracts the same bodies across refinement
+# iterations, and every miss costs a Lynette subprocess; failures (None) are
+# cached too, since retrying with identical inputs cannot succeed.
+_func_body_cache: Dict[Tuple[bytes, str, Optional[str]], Optional[str]] = {}
+
+
 def get_func_body(code, fname, util_path=None, logger=None):
+    cache_key = (
+        blake2b(code.encode(), digest_size=16).digest(),
+        fname,
+        str(util_path) if util_path is not None else None,
+    )
+    if cache_key in _func_body_cache:
+        return _func_body_cache[cache_key]
+    body = _get_func_body_uncached(code, fname, util_path, logger)
+    _func_body_cache[cache_key] = body
+    return body
+
+
+def _get_func_body_uncached(code, fname, util_path=None, logger=None):
     try:
         orig_f = tempfile.NamedTemporaryFile(
-            mode="w", delete=False, prefix="verus_agent_", suffix=".rs"
+            mode="w", delete=False, prefix="verus_agent_", suffix=".rs", dir=_SCRATCH_TMPDIR
         )
         orig_f.write(code)
         orig_f.close()
@@ -862,12 +1197,9 @@ def get_func_body(code, fname, util_path=None, logger=None):
 
         cargopath = str(cargopath.resolve())
 
-        lynette_extract_cmd = [
-            "cargo",
-            "run",
-            "--manifest-path",
-            cargopath,
-            "--",
+        # Use the prebuilt lynette binary when available; falls back to
+        # cargo run if the one-time build failed.
+        lynette_extract_cmd = lynette.command_prefix(cargopath) + [
             "func",
             "extract",
             "-b",
@@ -908,9 +1240,24 @@ def get_func_body(code, fname, util_path=None, logger=None):
         return None
 
 
+# Verus summary line parsed by evaluate, e.g. "3 verified, 1 errors".
+_VERUS_SCORE_RE = re.compile(r"(\d+) verified, (\d+) errors")
+
+# Results of evaluate keyed by (code digest, verus path, function filter).
+# same_code_verus compares one baseline against many variants, so identical
+# snippets recur; a hit skips the whole Verus subprocess.
+_evaluate_cache: Dict[Tuple[bytes, str, Optional[str]], Tuple[Tuple[int, int], Any]] = {}
+
+
 def evaluate(code, verus_path, func_name=None):
     """Simple Verus evaluation, returns score tuple and subprocess result."""
-    fn = tempfile.NamedTemporaryFile(mode="w", delete=False, prefix="llm4v_eval", suffix=".rs")
+    cache_key = (blake2b(code.encode(), digest_size=16).digest(), str(verus_path), func_name)
+    cached = _evaluate_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    fn = tempfile.NamedTemporaryFile(
+        mode="w", delete=False, prefix="llm4v_eval", suffix=".rs", dir=_SCRATCH_TMPDIR
+    )
     fn.write(code)
     fn.close()
 
@@ -920,79 +1267,92 @@ def evaluate(code, verus_path, func_name=None):
     m = subprocess.run(commands, capture_output=True, text=True)
     os.unlink(fn.name)
 
-    temp = 0
-    chunks = m.stderr.split("\n\n")
-    for ch in chunks:
-        if ch.startswith("error") and "aborting due to" not in ch:
-            temp += 1
-    try:
-        score = re.findall(r"(\d+) verified, (\d+) errors", m.stdout)[0]
-    except IndexError as e:
-        score = (0, max(1, temp))
+    temp = sum(
+        1 for ch in m.stderr.split("\n\n") if ch.startswith("error") and "aborting due to" not in ch
+    )
+    # search stops at the first summary line instead of collecting every
+    # match the way findall did.
+    score_match = _VERUS_SCORE_RE.search(m.stdout)
+    score = score_match.groups() if score_match else (0, max(1, temp))
     if score[0] == "0" and score[1] == "0":
         score = (0, temp)
     score = (int(score[0]), max(int(score[1]), temp))
+    _evaluate_cache[cache_key] = (score, m)
     return score, m
 
 
 def compress_nl_assertion(code):
     """Compresses nonlinear assertions into a single line."""
-    lines = code.split("\n")
+    # Accumulate pieces in lists and join once at the end; the old
+    # new_code/tmp_line string concatenation re-copied the full accumulator
+    # on every line, which is quadratic in file length.
     inside = False
-    tmp_line = ""
-    new_code = ""
-    for line in lines:
+    tmp_parts = []
+    new_parts = []
+    for line in code.split("\n"):
         if not inside:
             if line.strip().startswith("assert") and "by" in line and "nonlinear_arith" in line:
                 inside = True
-                tmp_line += line
+                tmp_parts.append(line)
             else:
-                new_code += line + "\n"
+                new_parts.append(line)
+                new_parts.append("\n")
         else:
             if "{}" in line:
-                tmp_line += " " + line.strip() + "\n"
+                tmp_parts.append(" " + line.strip() + "\n")
                 inside = False
-                new_code += tmp_line
-                tmp_line = ""
+                new_parts.append("".join(tmp_parts))
+                tmp_parts = []
             else:
-                tmp_line += " " + line.strip()
-    return new_code
+                tmp_parts.append(" " + line.strip())
+    return "".join(new_parts)
+
+
+# Strips a trailing '//' comment when normalizing loop invariants.
+_TRAILING_COMMENT_RE = re.compile(r"//.*")
 
 
 def remove_redundant_loopinv(code):
     """
     remove redundant loop invariants in code
     """
-    new_code = ""
+    # Kept lines are collected and joined once; the old new_code += pattern
+    # recopied the whole accumulator per line.
+    kept_lines = []
     invariants = False
-    invariantlist = []
+    seen_invariants = set()
     for line in code.split("\n"):
         remove = False
         if invariants:
             if line.strip().startswith("{"):
                 invariants = False
             else:
-                thisinv = re.sub(r"//.*", "", line).strip()
-                for inv in invariantlist:
-                    if thisinv == inv:
-                        remove = True
+                # Set membership instead of a linear scan over all
+                # invariants seen so far in this clause.
+                thisinv = _TRAILING_COMMENT_RE.sub("", line).strip()
+                remove = thisinv in seen_invariants
                 if not remove:
-                    invariantlist.append(thisinv)
+                    seen_invariants.add(thisinv)
         else:
             if line.strip().startswith("invariant"):
-                invariantlist = []
+                seen_invariants = set()
                 invariants = True
         if not remove:
-            new_code += line + "\n"
-    return new_code
+            kept_lines.append(line)
+    return "\n".join(kept_lines) + "\n"
 
 
 def same_code_verus(code1, code2, verus_path):
     """
     Check if two code snippets return the same Verus err results
     """
-    _, msg1 = evaluate(code1, verus_path)
-    _, msg2 = evaluate(code2, verus_path)
+    # The two verifier runs are independent subprocesses; overlap them
+    # instead of paying both latencies back to back.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future1 = executor.submit(evaluate, code1, verus_path)
+        future2 = executor.submit(evaluate, code2, verus_path)
+        _, msg1 = future1.result()
+        _, msg2 = future2.result()
     err1 = msg1.stderr + msg1.stdout
     err2 = msg2.stderr + msg2.stdout
     return err1 == err2
@@ -1023,6 +1383,14 @@ from src.utils.lemma_utils import (
 )
 
 
+# Example files on disk do not change during a run, but modules re-request the
+# same directories on every exec (and some on every retry). Memoize the loaded
+# pairs per (example_path, dir_name, max_examples) so each directory is read
+# from disk at most once per process. config/logger are unhashable, so this is
+# a plain dict rather than functools.lru_cache.
+_examples_cache: Dict[Tuple[str, str, Optional[int]], List[Dict[str, str]]] = {}
+
+
 def get_examples(
     config: Dict[str, Any],
     example_dir_name: str,
@@ -1032,7 +1400,8 @@ def get_examples(
     """
     Gathers example input/output pairs from two directories (input-<example_dir_name>
     and output-<example_dir_name>), and returns a list of dictionaries
-    with 'query' and 'answer' keys.
+    with 'query' and 'answer' keys. Results are cached per directory for the
+    lifetime of the process.
 
     Args:
         config: Configuration dictionary containing example_path
@@ -1043,6 +1412,16 @@ def get_examples(
     Returns:
         A list of example dictionaries, or an empty list if errors occur.
     """
+    cache_key = (
+        str(config.get("example_path", "src/examples")),
+        example_dir_name,
+        max_examples,
+    )
+    cached = _examples_cache.get(cache_key)
+    if cached is not None:
+        # Copy so callers can safely mutate the returned list.
+        return list(cached)
+
     examples = []
     try:
         examples_dir = Path(config.get("example_path", "src/examples"))
@@ -1057,45 +1436,57 @@ def get_examples(
             logger.warning(f"Output directory '{output_dir}' does not exist.")
             # Proceed but output files might be missing
 
-        # Collect input/output pairs
-        for input_file in sorted(input_dir.iterdir()):
-            # Only consider *.rs files that start with "ex"
-            if input_file.suffix == ".rs" and input_file.name.startswith("ex"):
-                output_file = output_dir / input_file.name
-
-                if not output_file.is_file():
-                    logger.warning(
-                        f"No matching output file for '{input_file}'. Using empty answer."
-                    )
-                    output_content = ""  # Use empty string if output is missing
-                else:
-                    try:
-                        output_content = output_file.read_text(encoding="utf-8")
-                    except OSError as e:
-                        logger.error(f"Failed to read output file '{output_file}': {e}")
-                        output_content = ""  # Use empty string on read error
+        # Collect input/output pairs first (only *.rs files starting with
+        # "ex"), then overlap the file reads on a thread pool: a cold load of
+        # dozens of example pairs is two blocking read_text calls per pair,
+        # bounded by filesystem latency rather than CPU. Results are consumed
+        # in directory order so the example list stays deterministic.
+        pairs = [
+            (input_file, output_dir / input_file.name)
+            for input_file in sorted(input_dir.iterdir())
+            if input_file.suffix == ".rs" and input_file.name.startswith("ex")
+        ]
 
-                # Safely read the input file
+        def _read_pair(pair):
+            input_file, output_file = pair
+            if not output_file.is_file():
+                logger.warning(f"No matching output file for '{input_file}'. Using empty answer.")
+                output_content = ""  # Use empty string if output is missing
+            else:
                 try:
-                    input_content = input_file.read_text(encoding="utf-8")
+                    output_content = output_file.read_text(encoding="utf-8")
                 except OSError as e:
-                    logger.error(f"Failed to read input file '{input_file}': {e}")
-                    continue  # Skip this example if input fails
-
-                # Skip exemplars where either side is empty/whitespace-only.
-                # Empty content gets serialized as user/assistant messages with
-                # empty strings, which Anthropic rejects with HTTP 400:
-                #   "messages.N: user messages must have non-empty content".
-                # The repo has historically shipped zero-byte placeholder files
-                # in src/examples/input-* and output-* (see commits removing them
-                # on 2026-05-15). Guarding here in case they reappear.
-                if not input_content.strip() or not output_content.strip():
-                    logger.warning(
-                        f"Skipping exemplar '{input_file.name}' — empty input or output"
-                    )
-                    continue
+                    logger.error(f"Failed to read output file '{output_file}': {e}")
+                    output_content = ""  # Use empty string on read error
+
+            # Safely read the input file
+            try:
+                input_content = input_file.read_text(encoding="utf-8")
+            except OSError as e:
+                logger.error(f"Failed to read input file '{input_file}': {e}")
+                return None  # Skip this example if input fails
+            return input_content, output_content
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            contents = list(executor.map(_read_pair, pairs))
+
+        for (input_file, _), result in zip(pairs, contents):
+            if result is None:
+                continue
+            input_content, output_content = result
+
+            # Skip exemplars where either side is empty/whitespace-only.
+            # Empty content gets serialized as user/assistant messages with
+            # empty strings, which Anthropic rejects with HTTP 400:
+            #   "messages.N: user messages must have non-empty content".
+            # The repo has historically shipped zero-byte placeholder files
+            # in src/examples/input-* and output-* (see commits removing them
+            # on 2026-05-15). Guarding here in case they reappear.
+            if not input_content.strip() or not output_content.strip():
+                logger.warning(f"Skipping exemplar '{input_file.name}' — empty input or output")
+                continue
 
-                examples.append({"query": input_content, "answer": output_content})
+            examples.append({"query": input_content, "answer": output_content})
 
         # Warn if no valid examples were found
         if not examples:
@@ -1109,12 +1500,17 @@ def get_examples(
         logger.info(f"Limiting examples from {len(examples)} to {max_examples}")
         examples = examples[:max_examples]
 
-    return examples
+    _examples_cache[cache_key] = examples
+    return list(examples)
+
+
+# Fenced ```rust / ```verus markdown blocks emitted by LLMs around code.
+_CODE_FENCE_RE = re.compile(r"```rust(.*)```|```verus(.*)```", re.DOTALL)
 
 
 def clean_code(code):
     """Remove markdown code blocks and potentially other unwanted characters."""
-    might_code = re.findall(r"```rust(.*)```|```verus(.*)```", code, flags=re.DOTALL)
+    might_code = _CODE_FENCE_RE.findall(code)
     if might_code:
         code = might_code[0][0] if might_code[0][0] else might_code[0][1]
 
@@ -1134,6 +1530,31 @@ def clean_code(code):
     return code
 
 
+# Keywords parse_llm_response uses to decide whether a bare response is
+# Rust/Verus code. No keyword is a prefix of another, so the alternation
+# order does not shadow any of them.
+_RUST_KEYWORDS = [
+    "fn ",
+    "struct ",
+    "impl ",
+    "pub ",
+    "let ",
+    "use ",
+    "mod ",
+    "trait ",
+    "enum ",
+    "match ",
+    "proof ",
+    "spec ",
+    "requires",
+    "ensures",
+    "invariant",
+    "View for",
+    "verus!",
+]
+_RUST_KEYWORD_RE = re.compile("|".join(map(re.escape, _RUST_KEYWORDS)))
+
+
 def parse_llm_response(response: str, logger=None) -> str:
     """
     General utility to parse and extract Rust/Verus code from any LLM response.
@@ -1158,11 +1579,10 @@ def parse_llm_response(response: str, logger=None) -> str:
     # First, try to extract code from markdown-style code blocks
     if "```" in response:
         blocks = []
-        lines = response.split("\n")
         in_code_block = False
         current_block = []
 
-        for line in lines:
+        for line in response.split("\n"):
             stripped_line = line.strip()
             # Check for code block markers
             if stripped_line.startswith("```"):
@@ -1200,31 +1620,9 @@ def parse_llm_response(response: str, logger=None) -> str:
             return remove_duplicate_main(combined_code, logger)
 
     # If no code blocks found, check if the response itself looks like Rust/Verus code
-    # by counting keyword occurrences
-    rust_keywords = [
-        "fn ",
-        "struct ",
-        "impl ",
-        "pub ",
-        "let ",
-        "use ",
-        "mod ",
-        "trait ",
-        "enum ",
-        "match ",
-        "proof ",
-        "spec ",
-        "requires",
-        "ensures",
-        "invariant",
-        "View for",
-        "verus!",
-    ]
-
-    keyword_count = 0
-    for keyword in rust_keywords:
-        if keyword in response:
-            keyword_count += 1
+    # by counting keyword occurrences. One alternation scan finds every
+    # distinct keyword instead of one full-text search per keyword.
+    keyword_count = len({m.group() for m in _RUST_KEYWORD_RE.finditer(response)})
 
     # If the response has several Rust/Verus keywords, it's likely code
     if keyword_count >= 3:
@@ -1232,19 +1630,12 @@ def parse_llm_response(response: str, logger=None) -> str:
             logger.info(
                 f"Response contains {keyword_count} Rust/Verus keywords - treating as direct code"
             )
-        # Clean up any markdown formatting
-        lines = response.split("\n")
-        cleaned_lines = []
-        for line in lines:
-            # Skip markdown formatting lines
-            if (
-                line.strip().startswith("```")
-                or line.strip().startswith("path=")
-                or line.strip().startswith("lines=")
-            ):
-                continue
-            cleaned_lines.append(line)
-        combined_code = "\n".join(cleaned_lines)
+        # Clean up any markdown formatting, dropping marker lines in one pass
+        combined_code = "\n".join(
+            line
+            for line in response.split("\n")
+            if not line.strip().startswith(("```", "path=", "lines="))
+        )
         # Remove duplicate main() functions
         return remove_duplicate_main(combined_code, logger)
 
@@ -397,6 +397,26 @@ class EvalScore:
 
         return False
 
+    def cmp(self, value: object) -> int:
+        """
+        Three-way comparison: 1 if self is better, -1 if worse, 0 if equal.
+
+        Callers that need both "is better" and "is tied" (e.g. tiebreaking)
+        can make one dispatch instead of separate __gt__ and __eq__ calls.
+        """
+        if not isinstance(value, EvalScore):
+            raise Exception("Invalid comparison")
+        # Compilation error is the highest priority
+        if self.compilation_error != value.compilation_error:
+            return -1 if self.compilation_error else 1
+        if self.verified != value.verified:
+            return 1 if self.verified > value.verified else -1
+        if self.errors != value.errors:
+            return 1 if self.errors < value.errors else -1
+        if self.verus_errors != value.verus_errors:
+            return 1 if self.verus_errors < value.verus_errors else -1
+        return 0
+
     def __le__(self, value: object) -> bool:
         return self < value or self == value
 
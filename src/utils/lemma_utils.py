@@ -2,7 +2,7 @@
 Utilities for handling lemmas in Verus code.
 """
 
-import os
+from pathlib import Path
 
 
 def insert_proof_func(code: str, proof_func_dict: dict) -> str:
@@ -39,13 +39,18 @@ def insert_lemma_func(code: str, lemma_names: list, lemma_path: str) -> str:
     Returns:
         Modified code with lemmas inserted
     """
+    # Gather all lemma bodies first and insert them in one pass:
+    # insert_proof_func re-splits, re-scans for verus! and re-joins the whole
+    # file on every call, so inserting per lemma traversed the file N times.
+    # Proof functions are top-level items, so their relative order does not
+    # matter to Verus.
+    lemma_func_dict = {}
     for lemma_name in lemma_names:
         name = lemma_name
         if not name.endswith(".rs"):
             name = name + ".rs"
-        input_file = os.path.join(lemma_path, name)
-        with open(input_file) as f:
-            lemma_code = f.read()
-        lemma_func_dict = {lemma_name: lemma_code}
-        code = insert_proof_func(code, lemma_func_dict)
-    return code
+        input_file = Path(lemma_path) / name
+        lemma_func_dict[lemma_name] = input_file.read_text(encoding="utf-8")
+    if not lemma_func_dict:
+        return code
+    return insert_proof_func(code, lemma_func_dict)
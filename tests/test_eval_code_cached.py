@@ -0,0 +1,46 @@
+import logging
+import unittest
+
+from src.modules.utils import _eval_code_cached, debug_type_error
+
+
+def make_logger() -> logging.Logger:
+    logger = logging.getLogger("test_eval_code_cached")
+    logger.addHandler(logging.NullHandler())
+    return logger
+
+
+class EvalCodeCachedMalformedTests(unittest.TestCase):
+    """The fast path for malformed samples must behave like a real failed run."""
+
+    def test_prose_sample_scores_as_compilation_error(self):
+        veval, score = _eval_code_cached(
+            "This response does not contain code.", make_logger()
+        )
+        self.assertTrue(score.compilation_error)
+        self.assertFalse(score.is_correct())
+
+    def test_skipped_sample_still_exposes_result_accessors(self):
+        # The fast path never runs eval(); a stubbed verus_result keeps the
+        # accessors usable instead of raising "No Verus result".
+        veval, _ = _eval_code_cached("short", make_logger())
+        self.assertEqual(veval.get_failures(), [])
+        self.assertFalse(veval.verus_succeed())
+
+    def test_duplicate_samples_reuse_the_cached_result(self):
+        logger = make_logger()
+        code = "not rust at all, just prose about lemmas"
+        first = _eval_code_cached(code, logger)
+        second = _eval_code_cached(code, logger)
+        self.assertIs(first[0], second[0])
+        self.assertIs(first[1], second[1])
+
+    def test_debug_type_error_discards_prose_gracefully(self):
+        code = "Sorry, I cannot produce Verus code for this request."
+        fixed, num_fixed = debug_type_error(code, logger=make_logger())
+        self.assertEqual(fixed, code)
+        self.assertEqual(num_fixed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
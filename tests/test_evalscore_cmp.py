@@ -0,0 +1,45 @@
+import unittest
+
+from src.modules.veval import EvalScore
+
+
+class EvalScoreCmpTests(unittest.TestCase):
+    def test_compilation_error_loses_to_anything_that_compiles(self):
+        compiles = EvalScore(1, 3, False)
+        broken = EvalScore(5, 0, True)
+        self.assertEqual(compiles.cmp(broken), 1)
+        self.assertEqual(broken.cmp(compiles), -1)
+
+    def test_more_verified_wins(self):
+        self.assertEqual(EvalScore(3, 1, False).cmp(EvalScore(2, 1, False)), 1)
+        self.assertEqual(EvalScore(2, 1, False).cmp(EvalScore(3, 1, False)), -1)
+
+    def test_fewer_errors_wins_at_equal_verified(self):
+        self.assertEqual(EvalScore(2, 1, False).cmp(EvalScore(2, 4, False)), 1)
+        self.assertEqual(EvalScore(2, 4, False).cmp(EvalScore(2, 1, False)), -1)
+
+    def test_fewer_verus_errors_breaks_remaining_ties(self):
+        a = EvalScore(2, 1, False, verus_errors=0)
+        b = EvalScore(2, 1, False, verus_errors=3)
+        self.assertEqual(a.cmp(b), 1)
+        self.assertEqual(b.cmp(a), -1)
+
+    def test_equal_scores_compare_as_zero(self):
+        a = EvalScore(2, 1, False, verus_errors=3)
+        b = EvalScore(2, 1, False, verus_errors=3)
+        self.assertEqual(a.cmp(b), 0)
+
+    def test_cmp_agrees_with_rich_comparisons(self):
+        better = EvalScore(3, 0, False)
+        worse = EvalScore(1, 2, False)
+        self.assertEqual(better.cmp(worse) == 1, better > worse)
+        self.assertEqual(worse.cmp(better) == -1, worse < better)
+        self.assertEqual(better.cmp(better) == 0, better == better)
+
+    def test_non_evalscore_operand_raises(self):
+        with self.assertRaisesRegex(Exception, "Invalid comparison"):
+            EvalScore(1, 0, False).cmp("not a score")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from src.modules.utils import remove_rust_comments
+
+
+class RemoveRustCommentsTests(unittest.TestCase):
+    def test_full_line_and_inline_comments_are_removed(self):
+        code = "// top\nfn f() {\n    let x = 1; // inline\n    // full\n}\n"
+        self.assertEqual(remove_rust_comments(code), "fn f() {\n    let x = 1;\n}")
+
+    def test_comment_only_input_becomes_empty(self):
+        self.assertEqual(remove_rust_comments("// a\n// b\n"), "")
+
+    def test_comment_free_code_only_loses_trailing_newline(self):
+        self.assertEqual(remove_rust_comments("fn f() {}\n"), "fn f() {}")
+
+    def test_blank_lines_are_preserved(self):
+        code = "fn f() {\n\n    let x = 1;\n}"
+        self.assertEqual(remove_rust_comments(code), code)
+
+
+if __name__ == "__main__":
+    unittest.main()
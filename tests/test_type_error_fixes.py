@@ -0,0 +1,91 @@
+import unittest
+from types import SimpleNamespace
+
+from src.modules.utils import fix_one_type_error, fix_one_type_error_in_code
+
+
+class FakeErrorTrace:
+    """Minimal stand-in for the VEval error trace used by the type fixer."""
+
+    def __init__(self, label, linenum, text, hl_start, hl_end):
+        self.strlabel = label
+        self._linenum = linenum
+        self._text = text
+        self.text = [SimpleNamespace(hl_start=hl_start, hl_end=hl_end)]
+
+    def get_lines(self):
+        return [self._linenum]
+
+    def get_text(self):
+        return self._text
+
+
+class FixOneTypeErrorTests(unittest.TestCase):
+    def test_bare_expression_is_wrapped_before_cast(self):
+        self.assertEqual(
+            fix_one_type_error("x = a + b;", 4, 8, "int"),
+            "x = ( a + b ) as int;",
+        )
+
+    def test_fully_parenthesized_expression_gets_cast_directly(self):
+        self.assertEqual(
+            fix_one_type_error("x = (a + b);", 4, 10, "int"),
+            "x = (a + b) as int;",
+        )
+        self.assertEqual(
+            fix_one_type_error("x = (f(x));", 4, 9, "int"),
+            "x = (f(x)) as int;",
+        )
+
+    def test_compound_parenthesized_expression_is_still_wrapped(self):
+        # "(a) + (b)" starts with "(" and ends with ")" but is not a single
+        # parenthesized group; a bare trailing cast would bind only to "(b)".
+        self.assertEqual(
+            fix_one_type_error("x = (a) + (b);", 4, 12, "int"),
+            "x = ( (a) + (b) ) as int;",
+        )
+
+    def test_existing_trailing_cast_is_replaced(self):
+        self.assertEqual(
+            fix_one_type_error("x = y as u32;", 4, 11, "int"),
+            "x = y as int;",
+        )
+
+    def test_inner_cast_does_not_count_as_trailing_cast(self):
+        # The cast in "y as u32 - 1" applies to a sub-expression, so the
+        # whole span still needs wrapping.
+        self.assertEqual(
+            fix_one_type_error("x = y as u32 - 1;", 4, 15, "int"),
+            "x = ( y as u32 - 1 ) as int;",
+        )
+
+
+class FixOneTypeErrorInCodeTests(unittest.TestCase):
+    CODE = "fn main() {\n    let x = a + b;\n}\n"
+    LINE = "    let x = a + b;"
+
+    def test_splices_cast_into_target_line_only(self):
+        trace = FakeErrorTrace("expected `int`", 2, self.LINE, 13, 18)
+        fixed = fix_one_type_error_in_code(self.CODE, trace, verbose=False)
+        self.assertEqual(fixed, "fn main() {\n    let x = ( a + b ) as int;\n}\n\n")
+
+    def test_line_number_past_end_of_file_leaves_code_unchanged(self):
+        trace = FakeErrorTrace("expected `int`", 99, self.LINE, 13, 18)
+        fixed = fix_one_type_error_in_code(self.CODE, trace, verbose=False)
+        self.assertEqual(fixed, self.CODE + "\n")
+
+    def test_line_removal_label_drops_the_line(self):
+        trace = FakeErrorTrace(
+            "no method named `view` found for struct `Foo`", 2, self.LINE, 13, 18
+        )
+        fixed = fix_one_type_error_in_code(self.CODE, trace, verbose=False)
+        self.assertEqual(fixed, "fn main() {\n}\n")
+
+    def test_expression_mismatch_returns_empty_string(self):
+        trace = FakeErrorTrace("expected `int`", 2, "    let y = c * d;", 13, 18)
+        fixed = fix_one_type_error_in_code(self.CODE, trace, verbose=False)
+        self.assertEqual(fixed, "")
+
+
+if __name__ == "__main__":
+    unittest.main()